@@ -1,9 +1,16 @@
 from __future__ import annotations
 
 import argparse
+import functools
+import hashlib
+import inspect
 import io
+import os
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Iterable, List, Optional, Sequence, Tuple, Union
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
 
 import logging
 logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
@@ -12,7 +19,6 @@ log = logging.getLogger("pdf_toolkit")
 # PDF + imaging
 from pypdf import PdfReader, PdfWriter
 import fitz  # PyMuPDF
-from PIL import Image
 
 # Docling
 from docling.document_converter import DocumentConverter
@@ -25,6 +31,102 @@ import numpy as np
 import cv2
 
 
+# Lazy per-process OCR engine: created once per worker process (or once in the
+# parent when running sequentially) so model-load cost is paid a single time.
+_OCR = None
+
+# Active OCR backend for this process: "onnxruntime" (default), "openvino" or
+# "cuda". OpenVINO runs the same PP-OCR models noticeably faster on CPU but
+# needs `pip install rapidocr_openvino`; "cuda" keeps onnxruntime and flips the
+# det/cls/rec sessions onto the CUDA execution provider (needs onnxruntime-gpu).
+_OCR_BACKEND = "onnxruntime"
+
+# How many text crops the recognition/classification models process per ONNX
+# session run. The default (6) leaves the rec model underfed on dense pages;
+# a larger batch amortizes session overhead across crops.
+_OCR_BATCH_SIZE = 32
+
+
+def _set_ocr_backend(backend: str) -> None:
+    """
+    Select the RapidOCR backend for this process. Also used as the process-pool
+    initializer so OCR workers pick the same backend as the parent.
+    """
+    global _OCR, _OCR_BACKEND
+    if backend != _OCR_BACKEND:
+        _OCR = None  # force rebuild with the new backend
+    _OCR_BACKEND = backend
+
+
+def _import_rapidocr(backend: str):
+    if backend == "openvino":
+        try:
+            from rapidocr_openvino import RapidOCR as _RapidOCR
+            return _RapidOCR
+        except ImportError:
+            log.warning(
+                "rapidocr_openvino not installed; falling back to onnxruntime backend"
+            )
+    return RapidOCR
+
+
+def _make_ocr():
+    engine_cls = _import_rapidocr(_OCR_BACKEND)
+    kwargs = {"rec_batch_num": _OCR_BATCH_SIZE, "cls_batch_num": _OCR_BATCH_SIZE}
+    if _OCR_BACKEND == "cuda":
+        kwargs.update(det_use_cuda=True, cls_use_cuda=True, rec_use_cuda=True)
+    # Optional custom recognition model, e.g. an INT8-quantized rec model
+    # produced offline with onnxruntime.quantization.quantize_dynamic —
+    # roughly 2x rec throughput on CPUs with VNNI int8 instructions.
+    rec_model = os.getenv("PDF_TOOLKIT_REC_MODEL")
+    if rec_model:
+        kwargs["rec_model_path"] = rec_model
+    try:
+        return engine_cls(**kwargs)
+    except Exception:
+        # older rapidocr builds don't accept these kwargs
+        return engine_cls()
+
+
+def _ocr_page_worker(img: np.ndarray) -> str:
+    """OCR one rendered page; top-level so it can be dispatched to a process pool."""
+    global _OCR
+    if _OCR is None:
+        _OCR = _make_ocr()
+    result, _ = _OCR(img)  # list of [box, text, score]
+    lines = [r[1] for r in result] if result else []
+    return "\n".join(lines).strip()
+
+
+@functools.lru_cache(maxsize=4)
+def _open_pdf_reader(path_str: str, mtime_ns: int) -> PdfReader:
+    """
+    Parsed-reader cache: re-parsing the xref table is pure waste when several
+    methods touch the same file. mtime in the key invalidates stale entries.
+    """
+    return PdfReader(path_str)
+
+
+# Lazy per-process Docling converters, keyed by force_ocr (same idea as _OCR).
+_MD_CONVERTERS: dict = {}
+
+
+def _md_page_worker(task: Tuple[bytes, str, bool]) -> str:
+    """
+    Convert one single-page PDF (passed as bytes) to markdown; top-level so it
+    can be dispatched to a process pool.
+    """
+    pdf_bytes, name, force_ocr = task
+    converter = _MD_CONVERTERS.get(force_ocr)
+    if converter is None:
+        converter = PDFToolkit._make_docling_converter(force_ocr=force_ocr)
+        _MD_CONVERTERS[force_ocr] = converter
+    from docling.datamodel.base_models import DocumentStream
+
+    page_src = DocumentStream(name=name, stream=io.BytesIO(pdf_bytes))
+    return converter.convert(page_src).document.export_to_markdown()
+
+
 class PDFToolkit:
     """
     Workspace-first utilities: upload, OCR (RapidOCR), PDF->Markdown, split, merge.
@@ -41,13 +143,18 @@ class PDFToolkit:
         base_dir: Path | str = "workspace",
         input_dir: Path | str = None,
         output_dir: Path | str = None,
-        dpi: int = 300
+        dpi: int = 200,
+        ocr_backend: str = "onnxruntime",  # "onnxruntime" | "openvino" | "cuda"
     ):
         self.base_dir = Path(base_dir)
         self.input_dir = Path(input_dir) if input_dir else self.base_dir / "input"
         self.output_dir = Path(output_dir) if output_dir else self.base_dir / "output"
         self.dpi = dpi
+        self.ocr_backend = ocr_backend
         self.paths = self._setup_paths()
+        # Docling converters keyed by force_ocr; building one loads pipeline
+        # models, so reuse across pages and across calls.
+        self._docling_converters: dict = {}
 
     def _setup_paths(self) -> dict:
         """
@@ -130,7 +237,9 @@ class PDFToolkit:
             if src.resolve() == dst.resolve():
                 accepted.append(dst)
                 continue
-            dst.write_bytes(src.read_bytes())
+            # streams in kernel buffers (sendfile on Linux) instead of pulling
+            # the whole file into a Python bytes object
+            shutil.copyfile(src, dst)
             accepted.append(dst)
             log.info(f"Ingested -> {dst}")
         return accepted
@@ -138,37 +247,174 @@ class PDFToolkit:
     # 2) OCR (RapidOCR only) ---------------------------------------------------------
 
     @staticmethod
-    def _render_pdf_to_images(pdf_path: Path, dpi: int = 300) -> List[np.ndarray]:
+    def _pixmap_to_array(pix: "fitz.Pixmap") -> np.ndarray:
+        # Build the array straight from the pixmap's RGB buffer; no PNG
+        # encode/decode round-trip. Copy so it outlives the pixmap.
+        img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(
+            pix.height, pix.width, 3
+        )
+        return img.copy()
+
+    @staticmethod
+    def _render_pdf_to_images(
+        pdf_path: Path, dpi: int = 300, pages: Optional[List[int]] = None
+    ) -> List[np.ndarray]:
         """
-        Render each PDF page to an RGB numpy array using PyMuPDF.
+        Render PDF pages to RGB numpy arrays using PyMuPDF.
+
+        pages: 0-based page indices to render; None renders every page.
+        Results come back in the order of `pages`.
+
+        Multi-page renders run in parallel threads (MuPDF rasterization is C
+        code that releases the GIL). MuPDF documents are not thread-safe, so
+        each thread opens its own handle — that only re-parses the xref table,
+        which is cheap next to rasterizing a page.
         """
-        images: List[np.ndarray] = []
         with fitz.open(pdf_path) as doc:
-            for page in doc:
-                pix = page.get_pixmap(dpi=dpi, alpha=False)  # 300 dpi recommended
-                img = Image.open(io.BytesIO(pix.tobytes("png"))).convert("RGB")
-                images.append(np.array(img))
+            if pages is None:
+                pages = list(range(doc.page_count))
+            workers = min(os.cpu_count() or 1, 8, len(pages) or 1)
+            if workers <= 1:
+                return [
+                    PDFToolkit._pixmap_to_array(
+                        doc[i].get_pixmap(dpi=dpi, alpha=False, colorspace=fitz.csRGB)
+                    )
+                    for i in pages
+                ]
+
+        local = threading.local()
+        thread_docs: List["fitz.Document"] = []
+
+        def _render(i: int) -> np.ndarray:
+            tdoc = getattr(local, "doc", None)
+            if tdoc is None:
+                tdoc = local.doc = fitz.open(pdf_path)
+                thread_docs.append(tdoc)
+            pix = tdoc[i].get_pixmap(dpi=dpi, alpha=False, colorspace=fitz.csRGB)
+            return PDFToolkit._pixmap_to_array(pix)
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as ex:
+                images = list(ex.map(_render, pages))
+        finally:
+            for tdoc in thread_docs:
+                tdoc.close()
         return images
 
     @staticmethod
-    def _postprocess_for_ocr(img: np.ndarray) -> np.ndarray:
+    def _render_cache_key(pdf_path: Path, dpi: int) -> str:
+        # Content fingerprint: first 64 KiB is enough to tell PDFs apart and
+        # keeps keying cheap on huge scans; mtime catches in-place edits.
+        h = hashlib.sha1()
+        with pdf_path.open("rb") as f:
+            h.update(f.read(65536))
+        return f"{h.hexdigest()[:16]}_{pdf_path.stat().st_mtime_ns}_{dpi}"
+
+    def _render_pdf_cached(
+        self, pdf_path: Path, dpi: int, pages: Optional[List[int]] = None
+    ) -> List[np.ndarray]:
         """
-        Light cleanup to help OCR: grayscale + denoise + threshold.
+        Rendered-page cache under temp/, keyed by (content hash, mtime, dpi)
+        plus the page number: repeated runs over the same file — a second
+        ocr_pdf call, or an OCR pass followed by a force-OCR markdown pass —
+        skip rasterization.
+
+        pages: 0-based indices to return (None = all). Each page caches as
+        its own .npy file written atomically, so only the requested pages are
+        ever rendered — a mostly-digital PDF with one scanned page rasterizes
+        just that page — and partial renders still populate the cache. Cached
+        pages reload with mmap_mode="r", so only consumed pixels fault in.
+        """
+        temp_dir = self.paths["temp"]
+        key = self._render_cache_key(pdf_path, dpi)
+        if pages is None:
+            with fitz.open(pdf_path) as doc:
+                pages = list(range(doc.page_count))
+
+        def page_file(i: int) -> Path:
+            return temp_dir / f"render_{key}_p{i + 1:04d}.npy"
+
+        images: Dict[int, np.ndarray] = {}
+        missing: List[int] = []
+        for i in pages:
+            try:
+                images[i] = np.load(page_file(i), mmap_mode="r")
+            except Exception:
+                missing.append(i)  # absent or corrupt: re-render this page
+        if missing:
+            for i, arr in zip(missing, self._render_pdf_to_images(pdf_path, dpi=dpi, pages=missing)):
+                images[i] = arr
+                try:
+                    tmp = page_file(i).with_suffix(".npy.tmp")
+                    with open(tmp, "wb") as f:
+                        np.save(f, arr)
+                    os.replace(tmp, page_file(i))
+                except Exception as e:
+                    log.warning(f"Could not cache rendered page {i + 1}: {e}")
+        return [images[i] for i in pages]
+
+    @staticmethod
+    def _postprocess_for_ocr(img: np.ndarray, mode: str = "fast") -> np.ndarray:
+        """
+        Cleanup to help OCR.
+
+        mode:
+          - "fast" (default): grayscale + Otsu global threshold. Both kernels
+            are SIMD-optimized and nearly free; plenty for printed text.
+          - "full": adds bilateral denoise + local adaptive threshold — much
+            slower, worth it only for noisy/unevenly lit scans.
         """
         gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
-        filt = cv2.bilateralFilter(gray, d=7, sigmaColor=50, sigmaSpace=50)
-        th = cv2.adaptiveThreshold(
-            filt, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 10
-        )
+        if mode == "full":
+            filt = cv2.bilateralFilter(gray, d=7, sigmaColor=50, sigmaSpace=50)
+            # Mean-based local threshold: computed with a running box sum
+            # (constant cost per pixel regardless of block size), unlike the
+            # Gaussian variant which convolves a 31x31 weighted kernel. For
+            # binarizing printed text the two are indistinguishable.
+            return cv2.adaptiveThreshold(
+                filt, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY, 31, 10
+            )
+        _, th = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
         return th
 
+    def _choose_ocr_dpi(self, pdf_path: Path) -> int:
+        """
+        Pick a render DPI for OCR. 200 DPI is plenty for ordinary body text
+        (and ~2.25x fewer pixels than 300); bump to 300 only when the first
+        page's dominant font size is small enough to need it. Scanned pages
+        expose no text layer and keep the configured default.
+        """
+        dpi = self.dpi
+        if dpi >= 300:
+            return dpi
+        try:
+            with fitz.open(pdf_path) as doc:
+                if doc.page_count == 0:
+                    return dpi
+                sizes = [
+                    span["size"]
+                    for block in doc[0].get_text("dict")["blocks"]
+                    for line in block.get("lines", [])
+                    for span in line["spans"]
+                ]
+            if sizes:
+                sizes.sort()
+                if sizes[len(sizes) // 2] < 8:  # median font below 8 pt
+                    return 300
+        except Exception:
+            pass
+        return dpi
+
     def ocr_pdf(
         self,
         pdf_path: Optional[Union[str, Path]] = None,
-        preprocess: bool = True,
+        preprocess: Union[bool, str] = True,  # False | True ("fast") | "fast" | "full"
         write_txt: bool = True,
         out_name: Optional[str] = None,
         output: str = "full",  # "full" | "pages"
+        num_workers: Optional[int] = None,
+        dpi: Optional[int] = None,
+        text_layer_threshold: int = 50,
     ) -> Tuple[Union[str, List[str]], Optional[Union[Path, List[Path]]]]:
         """
         OCR a (scanned) PDF with RapidOCR.
@@ -176,20 +422,68 @@ class PDFToolkit:
         output:
           - "full"  (default): returns a single string (with page breakers) and writes one file.
           - "pages": returns a list[str] (one per page) and writes one file per page.
+        num_workers:
+          - pages are OCR'd in parallel worker processes (each page is
+            independent and CPU-bound). Defaults to min(cpu_count, 4);
+            pass 1 to force sequential OCR in this process.
+        dpi:
+          - explicit render DPI; omit to auto-pick (default DPI, raised to 300
+            when the document's body text is unusually small).
+        text_layer_threshold:
+          - pages whose embedded text layer already has at least this many
+            characters are taken as-is and never rendered/OCR'd (born-digital
+            pages). Set to 0 to force OCR on every page.
 
         Returns (text_or_pages, saved_path_or_paths).
         """
         pdf_path = self._resolve_input_path(pdf_path)
-        images = self._render_pdf_to_images(pdf_path, dpi=self.dpi)
-        if preprocess:
-            images = [self._postprocess_for_ocr(im) for im in images]
 
-        ocr = RapidOCR()
-        page_texts: List[str] = []
-        for idx, im in enumerate(images, start=1):
-            result, _ = ocr(im)  # list of [box, text, score]
-            lines = [r[1] for r in result] if result else []
-            page_texts.append("\n".join(lines).strip())
+        # Born-digital pages carry a perfect text layer — reuse it and OCR
+        # only the pages that lack one.
+        with fitz.open(pdf_path) as doc:
+            page_texts: List[str] = [page.get_text("text").strip() for page in doc]
+        ocr_idx = [
+            i
+            for i, t in enumerate(page_texts)
+            if text_layer_threshold == 0 or len(t) < text_layer_threshold
+        ]
+
+        if ocr_idx:
+            # render only the pages being OCR'd — rasterization dominates
+            # pre-OCR cost, so digital pages must not pay it
+            images = self._render_pdf_cached(
+                pdf_path, dpi=dpi or self._choose_ocr_dpi(pdf_path), pages=ocr_idx
+            )
+            if preprocess:
+                mode = preprocess if isinstance(preprocess, str) else "fast"
+                if len(images) > 1:
+                    # OpenCV kernels release the GIL, so pages clean up in
+                    # parallel threads
+                    with ThreadPoolExecutor(
+                        max_workers=min(os.cpu_count() or 1, 8)
+                    ) as ex:
+                        images = list(
+                            ex.map(lambda im: self._postprocess_for_ocr(im, mode=mode), images)
+                        )
+                else:
+                    images = [self._postprocess_for_ocr(im, mode=mode) for im in images]
+
+            if num_workers is None:
+                num_workers = min(os.cpu_count() or 1, 4)
+            if num_workers > 1 and len(images) > 1:
+                with ProcessPoolExecutor(
+                    max_workers=num_workers,
+                    initializer=_set_ocr_backend,
+                    initargs=(self.ocr_backend,),
+                ) as ex:
+                    ocr_texts = list(ex.map(_ocr_page_worker, images))
+            else:
+                _set_ocr_backend(self.ocr_backend)
+                ocr_texts = [_ocr_page_worker(im) for im in images]
+            for i, txt in zip(ocr_idx, ocr_texts):
+                page_texts[i] = txt
+        else:
+            log.info(f"All pages of {pdf_path.name} have a text layer; skipped OCR")
 
         if output not in {"full", "pages"}:
             raise ValueError("output must be 'full' or 'pages'")
@@ -206,11 +500,14 @@ class PDFToolkit:
                 saved_paths.append(outp)
             return page_texts, (saved_paths if write_txt else None)
 
-        # output == "full"
-        breaker_joined = []
+        # output == "full" — stream pages into one buffer instead of building
+        # an intermediate list of per-page copies
+        buf = io.StringIO()
         for i, txt in enumerate(page_texts, start=1):
-            breaker_joined.append(f"--------- Page {i} ---------\n{txt}".rstrip())
-        full_text = "\n\n".join(breaker_joined).strip()
+            if i > 1:
+                buf.write("\n\n")
+            buf.write(f"--------- Page {i} ---------\n{txt}".rstrip())
+        full_text = buf.getvalue().strip()
 
         saved_path = None
         if write_txt:
@@ -223,8 +520,8 @@ class PDFToolkit:
 
     # 3) PDF -> Markdown with Docling ------------------------------------------------
 
+    @staticmethod
     def _make_docling_converter(
-        self,
         force_ocr: bool = False,
     ) -> DocumentConverter:
         """
@@ -302,16 +599,100 @@ class PDFToolkit:
 
         return DocumentConverter(format_options={InputFormat.PDF: PdfFmt(pipeline_options=pipe)})
 
+    def _get_docling_converter(self, force_ocr: bool = False) -> DocumentConverter:
+        converter = self._docling_converters.get(force_ocr)
+        if converter is None:
+            converter = self._make_docling_converter(force_ocr=force_ocr)
+            self._docling_converters[force_ocr] = converter
+        return converter
+
     def _docling_convert_one(self, pdf_or_page_path: Path, force_ocr: bool) -> str:
-        converter = self._make_docling_converter(force_ocr=force_ocr)
+        converter = self._get_docling_converter(force_ocr=force_ocr)
         return converter.convert(pdf_or_page_path).document.export_to_markdown()
 
+    # Sentinel handed to Docling's page_break_placeholder when splitting a
+    # whole-document export back into pages.
+    _PAGE_BREAK = "\x0c"
+
+    @staticmethod
+    def _docling_supports_page_break() -> bool:
+        try:
+            from docling_core.types.doc.document import DoclingDocument
+
+            return (
+                "page_break_placeholder"
+                in inspect.signature(DoclingDocument.export_to_markdown).parameters
+            )
+        except Exception:
+            return False
+
+    def _docling_convert_pages(
+        self, src_pdf: Path, force_ocr: bool, num_workers: Optional[int] = None
+    ) -> List[str]:
+        """
+        Convert a PDF to per-page markdown.
+
+        Preferred path: ONE Docling conversion of the whole document, split on
+        a page-break placeholder — the pipeline (layout, tables, optional OCR)
+        runs once instead of once per page, and no temp files are written.
+        Docling versions without page_break_placeholder fall back to the old
+        one-page loop, parallelized across worker processes since each page's
+        conversion is independent.
+        """
+        if self._docling_supports_page_break():
+            converter = self._get_docling_converter(force_ocr=force_ocr)
+            md = converter.convert(src_pdf).document.export_to_markdown(
+                page_break_placeholder=self._PAGE_BREAK
+            )
+            return [p.strip() for p in md.split(self._PAGE_BREAK)]
+
+        log.warning(
+            "Docling lacks page_break_placeholder; converting page-by-page (slower)"
+        )
+        try:
+            from docling.datamodel.base_models import DocumentStream
+        except Exception:
+            DocumentStream = None  # very old docling: temp files on disk
+
+        reader = _open_pdf_reader(str(src_pdf), src_pdf.stat().st_mtime_ns)
+        if DocumentStream is not None:
+            # hand one-page PDFs to Docling in memory; no disk round-trip
+            tasks: List[Tuple[bytes, str, bool]] = []
+            for i in range(len(reader.pages)):
+                writer = PdfWriter()
+                writer.add_page(reader.pages[i])
+                buf = io.BytesIO()
+                writer.write(buf)
+                tasks.append(
+                    (buf.getvalue(), f"{src_pdf.stem}_p{i+1:04d}.pdf", force_ocr)
+                )
+            if num_workers is None:
+                num_workers = min(os.cpu_count() or 1, 4)
+            if num_workers > 1 and len(tasks) > 1:
+                with ProcessPoolExecutor(max_workers=num_workers) as ex:
+                    return list(ex.map(_md_page_worker, tasks))
+            return [_md_page_worker(t) for t in tasks]
+
+        temp_dir = self.paths["temp"]
+        md_pages: List[str] = []
+        for i in range(len(reader.pages)):
+            writer = PdfWriter()
+            writer.add_page(reader.pages[i])
+            tmp_pdf_path = temp_dir / f"{src_pdf.stem}_tmp_p{i+1:04d}.pdf"
+            with tmp_pdf_path.open("wb") as f:
+                writer.write(f)
+            md_pages.append(
+                self._docling_convert_one(tmp_pdf_path, force_ocr=force_ocr)
+            )
+        return md_pages
+
     def pdf_to_markdown(
         self,
         pdf_path: Optional[Union[str, Path]] = None,
         force_ocr: bool = False,
         output: str = "full",  # "full" | "pages"
         out_name: Optional[str] = None,
+        num_workers: Optional[int] = None,
     ) -> Tuple[Union[str, List[str]], Union[Path, List[Path]]]:
         """
         Convert PDF to Markdown via Docling.
@@ -319,39 +700,23 @@ class PDFToolkit:
         output:
           - "full"  (default): returns a single markdown string (with page breakers) and writes one file.
           - "pages": returns list[str] (one per page) and writes one .md per page.
+        num_workers:
+          - worker processes for the per-page fallback path (ignored on the
+            single-conversion path). Defaults to min(cpu_count, 4).
 
         Returns (md_or_pages, saved_path_or_paths).
         """
         src_pdf = self._resolve_input_path(pdf_path)
 
-        # We produce page-aware markdown by converting each page separately
-        # (robust way to ensure page markers & "pages" output work across Docling versions).
-        reader = PdfReader(str(src_pdf))
-        total = len(reader.pages)
-        md_pages: List[str] = []
-        page_paths: List[Path] = []
+        if output not in {"full", "pages"}:
+            raise ValueError("output must be 'full' or 'pages'")
 
-        temp_dir = self.paths["temp"]
         md_dir = self.paths["md_out"]
         md_dir.mkdir(parents=True, exist_ok=True)
 
-        for i in range(total):
-            # Write a one-page temp PDF
-            tmp_pdf_path = temp_dir / f"{src_pdf.stem}_tmp_p{i+1:04d}.pdf"
-            writer = PdfWriter()
-            writer.add_page(reader.pages[i])
-            with tmp_pdf_path.open("wb") as f:
-                writer.write(f)
-
-            md_txt = self._docling_convert_one(tmp_pdf_path, force_ocr=force_ocr)
-            md_pages.append(md_txt)
-
-            # Persist per-page .md when output="pages"
-            page_md_path = md_dir / f"{src_pdf.stem}_p{i+1:04d}.md"
-            page_paths.append(page_md_path)
-
-        if output not in {"full", "pages"}:
-            raise ValueError("output must be 'full' or 'pages'")
+        md_pages = self._docling_convert_pages(
+            src_pdf, force_ocr=force_ocr, num_workers=num_workers
+        )
 
         if output == "pages":
             saved_paths: List[Path] = []
@@ -361,12 +726,14 @@ class PDFToolkit:
                 saved_paths.append(outp)
             return md_pages, saved_paths
 
-        # output == "full"
-        breaker_joined = []
+        # output == "full" — stream pages into one buffer instead of building
+        # an intermediate list of per-page copies
+        buf = io.StringIO()
         for i, md_txt in enumerate(md_pages, start=1):
-            breaker_joined.append(f"--------- Page {i} ---------\n\n{md_txt}".rstrip())
-
-        full_md = "\n\n".join(breaker_joined).strip()
+            if i > 1:
+                buf.write("\n\n")
+            buf.write(f"--------- Page {i} ---------\n\n{md_txt}".rstrip())
+        full_md = buf.getvalue().strip()
         out = md_dir / (out_name or (src_pdf.stem + ".md"))
         out.write_text(full_md, encoding="utf-8")
         log.info(f"Markdown saved -> {out}")
@@ -395,61 +762,61 @@ class PDFToolkit:
         Pages are 1-based.
         """
         src = self._resolve_input_path(pdf_path)
-        reader = PdfReader(str(src))
-        total = len(reader.pages)
-
-        # Build target page list
-        targets: List[int]
-        if page_range:
-            rng = page_range.replace(" ", "")
-            if "-" not in rng:
-                raise ValueError('page_range must look like "start-end", e.g., "1-5"')
-            start_s, end_s = rng.split("-", 1)
-            start_i = int(start_s)
-            end_i = int(end_s)
-            if start_i < 1 or end_i < 1 or start_i > end_i:
-                raise ValueError("Invalid page_range values")
-            targets = list(range(start_i, min(end_i, total) + 1))
-        elif pages:
-            targets = sorted(set(int(p) for p in pages if 1 <= int(p) <= total))
-            if not targets:
-                raise ValueError("No valid page numbers were provided")
-        else:
-            targets = list(range(1, total + 1))  # default: all pages
-
-        out_dir = self.paths["split_out"]
-        out_dir.mkdir(parents=True, exist_ok=True)
+        with fitz.open(src) as doc:
+            total = doc.page_count
 
-        outputs: List[Path] = []
-        if combined:
-            writer = PdfWriter()
-            for p in targets:
-                writer.add_page(reader.pages[p - 1])
-            # create a nice suffix
+            # Build target page list
+            targets: List[int]
             if page_range:
-                suffix = f"{targets[0]:04d}-{targets[-1]:04d}"
+                rng = page_range.replace(" ", "")
+                if "-" not in rng:
+                    raise ValueError('page_range must look like "start-end", e.g., "1-5"')
+                start_s, end_s = rng.split("-", 1)
+                start_i = int(start_s)
+                end_i = int(end_s)
+                if start_i < 1 or end_i < 1 or start_i > end_i:
+                    raise ValueError("Invalid page_range values")
+                targets = list(range(start_i, min(end_i, total) + 1))
+            elif pages:
+                targets = sorted(set(int(p) for p in pages if 1 <= int(p) <= total))
+                if not targets:
+                    raise ValueError("No valid page numbers were provided")
             else:
-                suffix = "sel_" + "_".join(f"{p:02d}" for p in targets[:10])
-                if len(targets) > 10:
-                    suffix += f"_plus{len(targets)-10}"
-            out = out_dir / f"{src.stem}_pages_{suffix}.pdf"
-            with out.open("wb") as f:
-                writer.write(f)
-            outputs.append(out)
-            log.info(f"Combined split -> {out} (pages {targets})")
+                targets = list(range(1, total + 1))  # default: all pages
+
+            out_dir = self.paths["split_out"]
+            out_dir.mkdir(parents=True, exist_ok=True)
+
+            outputs: List[Path] = []
+            if combined:
+                new_doc = fitz.open()
+                for p in targets:
+                    new_doc.insert_pdf(doc, from_page=p - 1, to_page=p - 1)
+                # create a nice suffix
+                if page_range:
+                    suffix = f"{targets[0]:04d}-{targets[-1]:04d}"
+                else:
+                    suffix = "sel_" + "_".join(f"{p:02d}" for p in targets[:10])
+                    if len(targets) > 10:
+                        suffix += f"_plus{len(targets)-10}"
+                out = out_dir / f"{src.stem}_pages_{suffix}.pdf"
+                new_doc.save(out, garbage=3, deflate=True)
+                new_doc.close()
+                outputs.append(out)
+                log.info(f"Combined split -> {out} (pages {targets})")
+                return outputs
+
+            # separate files per page
+            for p in targets:
+                new_doc = fitz.open()
+                new_doc.insert_pdf(doc, from_page=p - 1, to_page=p - 1)
+                out = out_dir / f"{src.stem}_p{p:04d}.pdf"
+                new_doc.save(out, garbage=3, deflate=True)
+                new_doc.close()
+                outputs.append(out)
+                log.info(f"Split page -> {out}")
             return outputs
 
-        # separate files per page
-        for p in targets:
-            writer = PdfWriter()
-            writer.add_page(reader.pages[p - 1])
-            out = out_dir / f"{src.stem}_p{p:04d}.pdf"
-            with out.open("wb") as f:
-                writer.write(f)
-            outputs.append(out)
-            log.info(f"Split page -> {out}")
-        return outputs
-
     # 5) Merging ---------------------------------------------------------------------
 
     def merge_pdfs(
@@ -461,13 +828,17 @@ class PDFToolkit:
         """
         out_dir = self.paths["merge_out"]
         out = out_dir / out_name
-        writer = PdfWriter()
-        for f in pdf_files:
-            resolved = self._resolve_input_path(f)
-            writer.append(str(resolved))
-            log.info(f"Appended: {resolved.name}")
-        with out.open("wb") as fp:
-            writer.write(fp)
+        out_doc = fitz.open()
+        try:
+            for f in pdf_files:
+                resolved = self._resolve_input_path(f)
+                with fitz.open(resolved) as d:
+                    out_doc.insert_pdf(d)
+                log.info(f"Appended: {resolved.name}")
+            # garbage=3 dedups objects shared across the merged files
+            out_doc.save(out, garbage=3, deflate=True)
+        finally:
+            out_doc.close()
         log.info(f"Merged -> {out}")
         return out
 
@@ -487,6 +858,9 @@ def build_cli() -> argparse.ArgumentParser:
     ocr.add_argument("pdf", nargs="?", default=None, help="PDF filename or path (omit if only one)")
     ocr.add_argument("--output", choices=["full", "pages"], default="full")
     ocr.add_argument("--no-pre", action="store_true", help="disable preprocessing")
+    ocr.add_argument("--pre-mode", choices=["fast", "full"], default="fast",
+                     help="preprocessing pipeline: fast=Otsu, full=bilateral+adaptive")
+    ocr.add_argument("--dpi", type=int, default=None, help="render DPI (default: auto, 200 or 300 for small text)")
 
     md = sub.add_parser("to-md", help="Convert PDF to Markdown via Docling")
     md.add_argument("pdf", nargs="?", default=None, help="PDF filename or path (omit if only one)")
@@ -517,8 +891,9 @@ def main():
     elif args.cmd == "ocr":
         txt_or_pages, paths = kit.ocr_pdf(
             args.pdf,
-            preprocess=not args.no_pre,
+            preprocess=False if args.no_pre else args.pre_mode,
             output=args.output,
+            dpi=args.dpi,
         )
         log.info(f"OCR output saved: {paths}")
 
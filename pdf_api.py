@@ -1,17 +1,23 @@
 # pdf_api.py
+import asyncio
+import hashlib
 import os
+import secrets
 import shutil
-import uuid
+import time
+import zipfile
 from pathlib import Path
-from typing import List, Optional, Dict
+from typing import Dict, List, Optional, Tuple
 
-from fastapi import FastAPI, File, UploadFile, HTTPException, Query
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, File, UploadFile, HTTPException, Query, Response
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
-import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import threading
+
+import anyio
+from cachetools import LRUCache, TTLCache
 
 # toolkit
 from main import PDFToolkit
@@ -20,6 +26,7 @@ app = FastAPI(
     title="PDF Processing API",
     description="API for PDF operations: OCR, PDF→Markdown, split pages, merge",
     version="1.5.0 (local-paths)",
+    default_response_class=ORJSONResponse,  # orjson is much faster for the large OCR/markdown payloads
 )
 
 app.add_middleware(
@@ -30,7 +37,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 4)
+
+@app.on_event("startup")
+async def _configure_threadpool():
+    # Size Starlette's shared worker pool once at startup instead of owning a
+    # separate executor. Sync handlers and to_thread saves all draw from this
+    # pool, so one knob governs total blocking-work concurrency.
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = int(os.getenv("PDF_WORKER_THREADS", os.cpu_count() or 4))
+
+
+@app.on_event("startup")
+async def _start_session_sweeper():
+    # keep a reference: asyncio holds tasks weakly, so an anonymous task
+    # can be garbage-collected mid-loop
+    app.state.sweeper_task = asyncio.create_task(_sweep_expired_sessions())
 
 # ----------------------- SESSION STATE -----------------------
 
@@ -44,42 +65,336 @@ class SessionConfig(BaseModel):
     input_dir: Optional[str] = None
     output_dir: Optional[str] = None
     created_at: datetime = None
+    # monotonic clock at creation; used for duration math so status checks
+    # don't allocate datetimes (and survive wall-clock adjustments)
+    started_mono: Optional[float] = None
+
+# Bounded session registry: a plain dict would grow forever under churn
+# (clients that create a session and never delete it). TTLCache evicts
+# entries automatically after SESSION_TTL_SECONDS and caps total count.
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", 24 * 3600))
+SESSIONS: TTLCache = TTLCache(maxsize=10_000, ttl=SESSION_TTL_SECONDS)
+SESSIONS_LOCK = threading.RLock()  # handlers may run on the threadpool
+
+# Fixed-detail exception built once; handlers only read status_code/detail,
+# so raising the shared instance is safe and avoids a per-miss allocation.
+_SESSION_NOT_FOUND = HTTPException(status_code=404, detail="Session not found")
+
+# One PDFToolkit per session: re-instantiating on every request repeats the
+# directory setup (a batch of mkdir calls) and throws away the toolkit's
+# internal caches. Same bound/TTL as SESSIONS so entries die together.
+_KIT_CACHE: TTLCache = TTLCache(maxsize=10_000, ttl=SESSION_TTL_SECONDS)
+_KIT_LOCK = threading.Lock()
+
+
+def _touch_session(session_id: str) -> Optional[SessionConfig]:
+    # Re-inserting resets the TTLCache timestamp, so the session's lifetime
+    # runs from last activity rather than creation.
+    with SESSIONS_LOCK:
+        config = SESSIONS.get(session_id)
+        if config is not None:
+            SESSIONS[session_id] = config
+    return config
 
-SESSIONS: Dict[str, SessionConfig] = {}
 
 def get_kit(session_id: str) -> PDFToolkit:
+    with _KIT_LOCK:
+        kit = _KIT_CACHE.get(session_id)
+        if kit is not None:
+            _KIT_CACHE[session_id] = kit  # refresh TTL: lifetime runs from last use
+    if kit is not None:
+        _touch_session(session_id)
+        return kit
+
     base_dir = Path(f"/tmp/pdf_processing/{session_id}")
-    config = SESSIONS.get(session_id)
-    
+    config = _touch_session(session_id)
+
     if config:
-        return PDFToolkit(
+        kit = PDFToolkit(
             base_dir=base_dir,
             input_dir=config.input_dir,
             output_dir=config.output_dir
         )
-    return PDFToolkit(base_dir=base_dir)
+    else:
+        kit = PDFToolkit(base_dir=base_dir)
+    # resolve once here; .resolve() is several syscalls and the base never moves
+    kit.resolved_base = kit.paths["base"].resolve()
+    with _KIT_LOCK:
+        _KIT_CACHE[session_id] = kit
+    return kit
+
+_SWEEP_INTERVAL_SECONDS = 60
+
+
+def _tree_idle_mtime(path: str) -> float:
+    """Newest directory mtime in the session tree.
+
+    Creating or rewriting a file bumps its parent directory's mtime, so the
+    newest mtime over the (few) directories approximates last activity
+    without statting every output file.
+    """
+    latest = 0.0
+    stack = [path]
+    try:
+        while stack:
+            current = stack.pop()
+            st = os.stat(current)
+            if st.st_mtime > latest:
+                latest = st.st_mtime
+            with os.scandir(current) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+    except OSError:
+        return time.time()  # can't judge: treat as active, retry next sweep
+    return latest
+
+
+async def _sweep_expired_sessions() -> None:
+    """Evict expired sessions and reclaim their /tmp directories.
+
+    TTLCache drops expired entries lazily on access; without a sweeper an
+    abandoned session's on-disk tree would survive until the server restarts.
+    Directories are only removed for sessions that positively expired from
+    the caches, or — for trees the server no longer knows about (e.g. after
+    a restart) — once the tree itself has been idle for a full TTL. A merely
+    unknown-but-recently-active directory is left alone, since data
+    endpoints serve any session id without requiring a SESSIONS entry.
+    """
+    root = Path("/tmp/pdf_processing")
+    while True:
+        await asyncio.sleep(_SWEEP_INTERVAL_SECONDS)
+        with SESSIONS_LOCK:
+            session_before = set(SESSIONS.keys())
+            SESSIONS.expire()
+            live = set(SESSIONS.keys())
+        with _KIT_LOCK:
+            kit_before = set(_KIT_CACHE.keys())
+            _KIT_CACHE.expire()
+            live |= set(_KIT_CACHE.keys())
+        expired = (session_before | kit_before) - live
+        with _KIT_LOCK:
+            for sid in expired:
+                _KIT_CACHE.pop(sid, None)
+        with _OUTPUT_INDEX_LOCK:
+            for sid in expired:
+                _OUTPUT_INDEX.pop(sid, None)
+        with _ZIP_LOCK:
+            for sid in expired:
+                _ZIP_CACHE.pop(sid, None)
+        for sid in expired:
+            _drop_session_results(sid)
+        try:
+            entries = [(e.name, e.path) for e in os.scandir(root) if e.is_dir()]
+        except FileNotFoundError:
+            continue
+        idle_cutoff = time.time() - SESSION_TTL_SECONDS
+        for name, path in entries:
+            if name in live:
+                continue
+            if name in expired or await anyio.to_thread.run_sync(_tree_idle_mtime, path) < idle_cutoff:
+                await anyio.to_thread.run_sync(
+                    lambda p=path: shutil.rmtree(p, ignore_errors=True)
+                )
 
-async def _run_blocking(func):
-    loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(executor, func)
 
-def _find_by_basename(root: Path, name: str):
-    return [p for p in root.rglob("*") if p.is_file() and p.name == name]
+_COPY_BUF_SIZE = 1024 * 1024  # 1 MiB: far fewer syscalls than the 64 KiB stdlib default
 
-def _pick_best_match(root: Path, candidates: List[Path]):
+_PDF_MIMES = frozenset({"application/pdf", "application/x-pdf", "application/octet-stream"})
+
+
+def _fast_copy(src, dst) -> None:
+    """
+    Copy an open source stream to an open destination file.
+
+    When the source exposes a real fd (a spooled upload that rolled to disk),
+    the bytes never enter userspace: os.copy_file_range is tried first (the
+    kernel can turn it into a reflink on btrfs/XFS), then os.sendfile; both
+    fall back to a large-buffer copyfileobj for in-memory spools and other
+    fd-less streams.
+    """
+    try:
+        src_fd = src.fileno()
+    except (AttributeError, OSError):
+        src_fd = None
+    if src_fd is not None:
+        if hasattr(os, "copy_file_range"):
+            try:
+                offset = 0
+                while True:
+                    moved = os.copy_file_range(
+                        src_fd, dst.fileno(), _COPY_BUF_SIZE, offset_src=offset
+                    )
+                    if moved == 0:
+                        return
+                    offset += moved
+            except OSError:
+                # not supported across these fds — or failed mid-stream:
+                # discard any bytes already landed before retrying, otherwise
+                # the next attempt appends after them and corrupts the file
+                src.seek(0)
+                dst.seek(0)
+                dst.truncate()
+        if hasattr(os, "sendfile"):
+            try:
+                offset = 0
+                while True:
+                    sent = os.sendfile(dst.fileno(), src_fd, offset, _COPY_BUF_SIZE)
+                    if sent == 0:
+                        return
+                    offset += sent
+            except OSError:
+                src.seek(0)  # sendfile unsupported here (e.g. pipe); copy below
+                dst.seek(0)
+                dst.truncate()
+    shutil.copyfileobj(src, dst, length=_COPY_BUF_SIZE)
+
+
+def _save_upload(file: UploadFile, dst: Path) -> None:
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    with open(dst, "wb") as buffer:
+        _fast_copy(file.file, buffer)
+
+
+def _walk_files(root):
+    # os.scandir walk yielding DirEntry objects: dirent type info answers
+    # is_dir/is_file without the extra stat syscall per entry that
+    # rglob + p.is_file() paid, and no Path object is built per entry.
+    stack = [str(root)]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry
+        except (FileNotFoundError, PermissionError):
+            continue
+
+
+def _scan_best(root: Path, name: str, output_prefix: str, keep: int = 5):
+    """Streaming variant of find+pick: walk once, track the best-so-far match
+    and retain only the first `keep` paths for the diagnostic header — O(1)
+    memory in the number of matches instead of materializing them all."""
+    best = None
+    best_key = (False, -1.0)
+    shown: List[str] = []
+    total = 0
+    for e in _walk_files(root):
+        if e.name != name:
+            continue
+        total += 1
+        if len(shown) < keep:
+            shown.append(e.path)
+        st = e.stat(follow_symlinks=False)
+        key = (e.path.startswith(output_prefix), st.st_mtime)
+        if best is None or key > best_key:
+            best, best_key = (Path(e.path), st), key
+    return best, shown, total
+
+
+def _pick_best_match(root: Path, candidates: List[Tuple[Path, os.stat_result]]):
     if not candidates:
         return None, []
-    output_candidates = [c for c in candidates if (root / "output") in c.parents]
-    pool = output_candidates or candidates
-    best = max(pool, key=lambda p: p.stat().st_mtime)
+    # Single pass: output-dir membership (plain string-prefix test) ranks
+    # above mtime, both read from data captured during the walk.
+    output_prefix = str(root / "output") + os.sep
+    best = max(
+        candidates,
+        key=lambda c: (str(c[0]).startswith(output_prefix), c[1].st_mtime),
+    )
     return best, candidates
 
-def _zip_outputs(base: Path) -> Path:
-    out_dir = base / "output"
-    target_dir = out_dir if out_dir.exists() and any(out_dir.rglob("*")) else base
-    zip_name = "download_all"
-    archive_path = shutil.make_archive(str(base / zip_name), "zip", root_dir=target_dir)
-    return Path(archive_path)
+_INLINE_DOWNLOAD_MAX = 256 * 1024  # below this, send the bytes inline
+
+
+class BigFileResponse(FileResponse):
+    """FileResponse with a 1 MiB chunk size: fewer read/send syscalls for the
+    multi-MB PDFs and zips this API typically serves (default is 64 KiB)."""
+
+    chunk_size = _COPY_BUF_SIZE
+
+
+def _has_any(p: Path) -> bool:
+    """True if the directory exists and holds at least one entry (O(1) probe)."""
+    try:
+        with os.scandir(p) as it:
+            return next(it, None) is not None
+    except FileNotFoundError:
+        return False
+
+
+class _ZipBuffer:
+    """Minimal unseekable file-like sink for streaming zip creation."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._pos = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _iter_zip(target_dir: Path):
+    """
+    Stream a zip of target_dir entry by entry: the client sees the first byte
+    immediately and no archive file is ever materialized on disk. Entries are
+    stored uncompressed (ZIP_STORED) — the PDFs inside are already deflated,
+    so compressing again only burns CPU.
+    """
+    prefix_len = len(str(target_dir)) + 1
+    buf = _ZipBuffer()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_STORED) as zf:
+        for path in sorted(e.path for e in _walk_files(target_dir)):
+            zf.write(path, arcname=path[prefix_len:])
+            chunk = buf.drain()
+            if chunk:
+                yield chunk
+    chunk = buf.drain()
+    if chunk:
+        yield chunk
+
+# Full-download zip cache: repeated /download (no name) calls from polling
+# clients rebuild an identical archive every time. Keyed per session with a
+# walk fingerprint (count, newest mtime, total bytes); any op that changes the
+# tree changes the fingerprint, so stale archives are never served. Only
+# modest archives are cached — large ones stay on the streaming path.
+_ZIP_CACHE: LRUCache = LRUCache(maxsize=8)
+_ZIP_LOCK = threading.Lock()
+_ZIP_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+def _zip_fingerprint(target_dir: Path) -> Tuple[int, float, int]:
+    count = 0
+    latest = 0.0
+    size = 0
+    for e in _walk_files(target_dir):
+        st = e.stat(follow_symlinks=False)
+        count += 1
+        size += st.st_size
+        if st.st_mtime > latest:
+            latest = st.st_mtime
+    return count, latest, size
+
+
+def _build_zip_bytes(target_dir: Path) -> bytes:
+    return b"".join(_iter_zip(target_dir))
+
 
 # ----------------------- SESSION -----------------------
 
@@ -89,14 +404,16 @@ async def create_session(config: Optional[SessionConfig] = None):
     Create a new session ID. 
     Optionally pass 'input_dir' and 'output_dir' to use existing local folders.
     """
-    session_id = str(uuid.uuid4())
+    session_id = secrets.token_urlsafe(16)
     now = datetime.now()
     
-    if config:
-        config.created_at = now
-        SESSIONS[session_id] = config
-    else:
-        SESSIONS[session_id] = SessionConfig(created_at=now)
+    with SESSIONS_LOCK:
+        if config:
+            config.created_at = now
+            config.started_mono = time.monotonic()
+            SESSIONS[session_id] = config
+        else:
+            SESSIONS[session_id] = SessionConfig(created_at=now, started_mono=time.monotonic())
     return {"session_id": session_id, "started_at": now.isoformat()}
 
 @app.get("/session/{session_id}/status", tags=["session"])
@@ -104,17 +421,23 @@ async def get_session_status(session_id: str):
     """
     Get session duration and status.
     """
-    config = SESSIONS.get(session_id)
+    # TTLCache reads mutate internal state (lazy expiry), so even lookups
+    # need the lock now that handlers run on threadpool threads
+    with SESSIONS_LOCK:
+        config = SESSIONS.get(session_id)
     if not config:
-        raise HTTPException(status_code=404, detail="Session not found")
+        raise _SESSION_NOT_FOUND
     
-    duration = datetime.now() - config.created_at
+    if config.started_mono is not None:
+        seconds = time.monotonic() - config.started_mono
+    else:
+        seconds = (datetime.now() - config.created_at).total_seconds()
     return {
         "session_id": session_id,
         "active": True,
         "started_at": config.created_at.isoformat(),
-        "duration_seconds": duration.total_seconds(),
-        "duration_human": str(duration).split('.')[0]  # HH:MM:SS
+        "duration_seconds": seconds,
+        "duration_human": f"{int(seconds) // 3600}:{int(seconds) % 3600 // 60:02d}:{int(seconds) % 60:02d}"  # HH:MM:SS
     }
 
 @app.get("/session/{session_id}/files", tags=["session"])
@@ -124,7 +447,10 @@ async def list_files(session_id: str):
     """
     try:
         kit = get_kit(session_id)
-        files = [p.name for p in kit._list_input_pdfs()]
+        # directory listing hits the disk; keep it off the event loop
+        files = await anyio.to_thread.run_sync(
+            lambda: [p.name for p in kit._list_input_pdfs()]
+        )
         return {"files": files, "input_dir": str(kit.paths["input"])}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -136,13 +462,21 @@ async def cleanup_session(session_id: str):
     """
     try:
         # Remove from memory
-        if session_id in SESSIONS:
-            del SESSIONS[session_id]
-            
-        # Remove temp files
+        with SESSIONS_LOCK:
+            SESSIONS.pop(session_id, None)
+        with _KIT_LOCK:
+            _KIT_CACHE.pop(session_id, None)
+        with _OUTPUT_INDEX_LOCK:
+            _OUTPUT_INDEX.pop(session_id, None)
+        with _ZIP_LOCK:
+            _ZIP_CACHE.pop(session_id, None)
+        _drop_session_results(session_id)
+
+        # Remove temp files; rmtree of a large session can take seconds, so
+        # run it on the threadpool instead of stalling the event loop
         base_dir = Path(f"/tmp/pdf_processing/{session_id}")
         if base_dir.exists():
-            shutil.rmtree(base_dir)
+            await anyio.to_thread.run_sync(lambda: shutil.rmtree(base_dir, ignore_errors=True))
             
         return {"message": f"Session {session_id} stopped and cleaned up"}
     except Exception as e:
@@ -157,20 +491,99 @@ async def upload_files(
 ):
     try:
         kit = get_kit(session_id)
-        saved_paths = []
+        # Validate everything before writing anything, so a bad file in the
+        # batch rejects the request without leaving partial saves behind.
         for file in files:
-            if file.content_type not in ("application/pdf", "application/x-pdf", "application/octet-stream"):
-                if not file.filename.lower().endswith(".pdf"):
-                    raise HTTPException(status_code=400, detail=f"Only PDF files allowed: {file.filename}")
-            dst = kit.paths["input"] / file.filename
-            dst.parent.mkdir(parents=True, exist_ok=True)
-            with open(dst, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-            saved_paths.append(str(dst))
+            if file.content_type not in _PDF_MIMES and not file.filename.lower().endswith(".pdf"):
+                raise HTTPException(status_code=400, detail=f"Only PDF files allowed: {file.filename}")
+        dsts = [kit.paths["input"] / file.filename for file in files]
+        # disk writes block; run them concurrently on the threadpool so the
+        # OS can pipeline writes instead of saving file N+1 only after N
+        await asyncio.gather(
+            *(anyio.to_thread.run_sync(_save_upload, file, dst) for file, dst in zip(files, dsts))
+        )
+        saved_paths = [str(dst) for dst in dsts]
         return {"message": f"Uploaded {len(saved_paths)} file(s)", "files": saved_paths}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Per-session output manifest: basename -> paths recorded as each op returns.
+# /download?name= consults this in O(1) instead of walking the session tree;
+# the walk remains as fallback for files produced outside the API handlers.
+_OUTPUT_INDEX: Dict[str, Dict[str, List[str]]] = {}
+_OUTPUT_INDEX_LOCK = threading.Lock()
+
+
+def _index_outputs(session_id: str, paths) -> None:
+    if not paths:
+        return
+    with _OUTPUT_INDEX_LOCK:
+        index = _OUTPUT_INDEX.setdefault(session_id, {})
+        for p in paths:
+            entry = index.setdefault(Path(p).name, [])
+            if str(p) not in entry:
+                entry.append(str(p))
+
+
+def _indexed_matches(session_id: str, name: str) -> List[Tuple[Path, os.stat_result]]:
+    with _OUTPUT_INDEX_LOCK:
+        paths = list(_OUTPUT_INDEX.get(session_id, {}).get(name, ()))
+    matches = []
+    for p in paths:
+        try:
+            matches.append((Path(p), os.stat(p)))
+        except OSError:
+            continue  # recorded file was removed; fall through to the walk
+    return matches
+
+
+# Heavy-op result cache: OCR and markdown payloads keyed by session, input
+# content hash and parameters. Retries and dev loops on an unchanged PDF
+# return from memory instead of re-running the pipeline; content hashing
+# survives renames and invalidates on any edit. The session id is part of
+# the key because payloads carry file paths into that session's tree — the
+# same PDF in another session must produce its own output files there.
+_RESULT_CACHE: LRUCache = LRUCache(maxsize=128)
+_RESULT_LOCK = threading.Lock()
+
+
+def _file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _result_cache_key(session_id: str, kit: PDFToolkit, filename: Optional[str], *params):
+    try:
+        src = kit._resolve_input_path(filename)
+        return (session_id, _file_sha256(src)) + params
+    except Exception:
+        return None  # unresolvable input: let the op raise its own error
+
+
+def _drop_session_results(session_id: str) -> None:
+    with _RESULT_LOCK:
+        for key in [k for k in _RESULT_CACHE if k[0] == session_id]:
+            _RESULT_CACHE.pop(key, None)
+
+
+# OCR and Docling are internally multi-threaded, so running many conversions
+# at once thrashes the CPU instead of adding throughput. This gate bounds how
+# many OCR/markdown requests run concurrently; the rest queue on it. It is an
+# asyncio semaphore awaited *before* dispatching to the threadpool — queued
+# requests wait on the event loop without holding a worker thread, so
+# uploads, listings and cleanup keep flowing during an OCR burst.
+_HEAVY_OP_SEM = asyncio.Semaphore(int(os.getenv("MAX_CONCURRENT_OCR", "3")))
+
+
+# The light ops handlers are plain `def`: Starlette runs them on its
+# threadpool directly, instead of the async-handler -> custom-executor
+# double hop. The two heavy ones are async so they can await the gate.
+
 @app.post("/session/{session_id}/ocr", tags=["ops"])
 async def ocr_pdf(
     session_id: str,
@@ -180,13 +593,29 @@ async def ocr_pdf(
 ):
     try:
         kit = get_kit(session_id)
-        text_or_pages, path_or_paths = await _run_blocking(
-            lambda: kit.ocr_pdf(pdf_path=filename, preprocess=preprocess, output=output)
+        # hashing the input reads the whole file; keep it off the event loop
+        cache_key = await anyio.to_thread.run_sync(
+            _result_cache_key, session_id, kit, filename, "ocr", preprocess, output
         )
+        if cache_key:
+            with _RESULT_LOCK:
+                cached = _RESULT_CACHE.get(cache_key)
+            if cached is not None:
+                return cached
+        async with _HEAVY_OP_SEM:
+            text_or_pages, path_or_paths = await anyio.to_thread.run_sync(
+                lambda: kit.ocr_pdf(pdf_path=filename, preprocess=preprocess, output=output)
+            )
         if output == "full":
-            return {"text": text_or_pages, "file_path": str(path_or_paths) if path_or_paths else None}
+            payload = {"text": text_or_pages, "file_path": str(path_or_paths) if path_or_paths else None}
+            _index_outputs(session_id, [path_or_paths] if path_or_paths else [])
         else:
-            return {"pages": text_or_pages, "file_paths": [str(p) for p in (path_or_paths or [])]}
+            payload = {"pages": text_or_pages, "file_paths": [str(p) for p in (path_or_paths or [])]}
+            _index_outputs(session_id, path_or_paths or [])
+        if cache_key:
+            with _RESULT_LOCK:
+                _RESULT_CACHE[cache_key] = payload
+        return payload
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -199,18 +628,34 @@ async def to_markdown(
 ):
     try:
         kit = get_kit(session_id)
-        md_or_pages, path_or_paths = await _run_blocking(
-            lambda: kit.pdf_to_markdown(pdf_path=filename, force_ocr=force_ocr, output=output)
+        # hashing the input reads the whole file; keep it off the event loop
+        cache_key = await anyio.to_thread.run_sync(
+            _result_cache_key, session_id, kit, filename, "md", force_ocr, output
         )
+        if cache_key:
+            with _RESULT_LOCK:
+                cached = _RESULT_CACHE.get(cache_key)
+            if cached is not None:
+                return cached
+        async with _HEAVY_OP_SEM:
+            md_or_pages, path_or_paths = await anyio.to_thread.run_sync(
+                lambda: kit.pdf_to_markdown(pdf_path=filename, force_ocr=force_ocr, output=output)
+            )
         if output == "full":
-            return {"markdown": md_or_pages, "file_path": str(path_or_paths) if path_or_paths else None}
+            payload = {"markdown": md_or_pages, "file_path": str(path_or_paths) if path_or_paths else None}
+            _index_outputs(session_id, [path_or_paths] if path_or_paths else [])
         else:
-            return {"pages": md_or_pages, "file_paths": [str(p) for p in (path_or_paths or [])]}
+            payload = {"pages": md_or_pages, "file_paths": [str(p) for p in (path_or_paths or [])]}
+            _index_outputs(session_id, path_or_paths or [])
+        if cache_key:
+            with _RESULT_LOCK:
+                _RESULT_CACHE[cache_key] = payload
+        return payload
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/session/{session_id}/split-pages", tags=["ops"])
-async def split_pages(
+def split_pages(
     session_id: str,
     filename: Optional[str] = None,
     pages: Optional[List[int]] = None,
@@ -219,22 +664,24 @@ async def split_pages(
 ):
     try:
         kit = get_kit(session_id)
-        outputs = await _run_blocking(
-            lambda: kit.split_pages(pdf_path=filename, pages=pages, page_range=page_range, combined=combined)
+        outputs = kit.split_pages(
+            pdf_path=filename, pages=pages, page_range=page_range, combined=combined
         )
+        _index_outputs(session_id, outputs)
         return {"output_files": [str(p) for p in outputs]}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/session/{session_id}/merge", tags=["ops"])
-async def merge_pdfs(
+def merge_pdfs(
     session_id: str,
     filenames: List[str],
     out_name: str = "merged.pdf",
 ):
     try:
         kit = get_kit(session_id)
-        outp = await _run_blocking(lambda: kit.merge_pdfs(pdf_files=filenames, out_name=out_name))
+        outp = kit.merge_pdfs(pdf_files=filenames, out_name=out_name)
+        _index_outputs(session_id, [outp])
         return {"output_file": str(outp)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -245,29 +692,67 @@ async def download(
     name: Optional[str] = Query(default=None, description="Just the filename (e.g., 'file.pdf'). Omit to download all outputs as a zip."),
 ):
     kit = get_kit(session_id)
-    base = kit.paths["base"].resolve()
+    base = kit.resolved_base
 
     if name is None:
-        try:
-            zip_path = _zip_outputs(base)
-            return FileResponse(path=zip_path, filename=zip_path.name, media_type="application/zip")
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to create zip: {e}")
+        out_dir = base / "output"
+        target_dir = out_dir if _has_any(out_dir) else base
+        zip_headers = {"Content-Disposition": 'attachment; filename="download_all.zip"'}
+
+        fp = await anyio.to_thread.run_sync(_zip_fingerprint, target_dir)
+        with _ZIP_LOCK:
+            cached = _ZIP_CACHE.get(session_id)
+        if cached is not None and cached[0] == fp:
+            return Response(content=cached[1], media_type="application/zip", headers=zip_headers)
+
+        if fp[2] <= _ZIP_CACHE_MAX_BYTES:
+            data = await anyio.to_thread.run_sync(_build_zip_bytes, target_dir)
+            with _ZIP_LOCK:
+                _ZIP_CACHE[session_id] = (fp, data)
+            return Response(content=data, media_type="application/zip", headers=zip_headers)
+
+        # too big to hold in memory: stream it entry by entry as before
+        return StreamingResponse(
+            _iter_zip(target_dir),
+            media_type="application/zip",
+            headers=zip_headers,
+        )
 
-    candidates = _find_by_basename(base, name)
-    best, all_matches = _pick_best_match(base, candidates)
+    # O(1) manifest lookup first, then a streaming walk of the output/
+    # subtree, then the full session tree — each step only runs if the
+    # previous one found nothing.
+    output_prefix = str(base / "output") + os.sep
+    candidates = _indexed_matches(session_id, name)
+    if candidates:
+        best, all_matches = _pick_best_match(base, candidates)
+        shown = [str(p) for p, _ in all_matches[:5]]
+        total = len(all_matches)
+    else:
+        best, shown, total = _scan_best(base / "output", name, output_prefix)
+        if best is None:
+            best, shown, total = _scan_best(base, name, output_prefix)
     if best is None:
         raise HTTPException(status_code=404, detail=f"No file named '{name}' found in session outputs")
+    best_path, best_stat = best
 
     headers = {}
-    if len(all_matches) > 1:
-        try:
-            rels = [str(p.resolve().relative_to(base)) for p in all_matches]
-            headers["X-Download-Note"] = f"Multiple matches for {name}; returning most recent. Candidates: {', '.join(rels[:5])}{' ...' if len(rels)>5 else ''}"
-        except Exception:
-            pass
-
-    return FileResponse(path=str(best), filename=best.name, media_type="application/octet-stream", headers=headers)
+    if total > 1:
+        # plain string slicing against the resolved base beats a Path
+        # round-trip + relative_to per shown candidate; custom output dirs
+        # outside the base keep their full path
+        base_prefix = str(base) + os.sep
+        rels = [p[len(base_prefix):] if p.startswith(base_prefix) else p for p in shown]
+        headers["X-Download-Note"] = f"Multiple matches for {name}; returning most recent. Candidates: {', '.join(rels)}{' ...' if total>5 else ''}"
+
+    if best_stat.st_size < _INLINE_DOWNLOAD_MAX:
+        # Small file: one read and one body message beats the FileResponse
+        # stat/sendfile/chunked-send machinery.
+        headers["Content-Disposition"] = f'attachment; filename="{best_path.name}"'
+        return Response(content=best_path.read_bytes(), media_type="application/octet-stream", headers=headers)
+
+    # stat_result propagates the stat captured during the walk, so serving
+    # the file adds no stat syscalls at all
+    return BigFileResponse(path=str(best_path), filename=best_path.name, media_type="application/octet-stream", headers=headers, stat_result=best_stat)
 
 if __name__ == "__main__":
     import uvicorn
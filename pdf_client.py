@@ -11,6 +11,7 @@ Run: python client_full.py
 
 import pathlib
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Iterable, List, Tuple
 
 # =========================
@@ -18,9 +19,14 @@ from typing import Iterable, List, Tuple
 # =========================
 BASE = "http://localhost:5005"     # your API base
 
+# One Session for the whole run: keep-alive connections are reused across
+# the dozen-plus requests below instead of opening a new TCP socket each time.
+HTTP = requests.Session()
+
 PDF_DIR   = pathlib.Path("./pdfs") # folder containing PDFs to upload
 RECURSIVE = True                   # include subfolders?
 BATCH_SIZE = 8                     # PDFs per upload request
+UPLOAD_WORKERS = 3                 # concurrent upload batches in flight
 
 # choose which uploaded file to target for per-file operations
 PICK_FIRST_UPLOADED_FOR_DEMOS = True
@@ -58,7 +64,7 @@ def open_files_for_multipart(paths: List[pathlib.Path]) -> Tuple[List[Tuple[str,
 # =========================
 if __name__ == "__main__":
     # 1) Create Session -> { session_id }
-    r = requests.post(f"{BASE}/session/new")
+    r = HTTP.post(f"{BASE}/session/new")
     r.raise_for_status()
     hs = r.json()
     session_id = hs["session_id"]
@@ -70,23 +76,30 @@ if __name__ == "__main__":
         raise SystemExit(f"No PDFs found in {PDF_DIR} (recursive={RECURSIVE})")
     print(f"[upload] found {len(pdfs)} PDFs under {PDF_DIR.resolve()} (recursive={RECURSIVE})")
 
-    # 3) Upload in batches
-    uploaded_total = 0
-    for i, group in enumerate(batch(pdfs, BATCH_SIZE), start=1):
+    # 3) Upload in batches, a few batches in flight at once so client-side
+    #    reads overlap server-side disk writes
+    def upload_batch(i_group):
+        i, group = i_group
         files_param, handles = open_files_for_multipart(group)
         try:
-            rr = requests.post(
+            rr = HTTP.post(
                 f"{BASE}/session/{session_id}/upload",
                 files=files_param,
                 timeout=300,
             )
             rr.raise_for_status()
-            uploaded_total += len(group)
             print(f"[upload][batch {i}] {len(group)} file(s) -> OK")
+            return len(group)
         finally:
             for h in handles:
                 try: h.close()
                 except: pass
+
+    uploaded_total = 0
+    groups = list(enumerate(batch(pdfs, BATCH_SIZE), start=1))
+    with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as pool:
+        for fut in as_completed(pool.submit(upload_batch, g) for g in groups):
+            uploaded_total += fut.result()
     print(f"[upload] done: {uploaded_total} file(s) uploaded")
 
     # pick a file name to demonstrate per-file calls (first uploaded)
@@ -98,14 +111,14 @@ if __name__ == "__main__":
     # OCR
     # =========================
     # a) one combined TXT (with page breakers)
-    rr = requests.post(f"{BASE}/session/{session_id}/ocr",
+    rr = HTTP.post(f"{BASE}/session/{session_id}/ocr",
                        params={"filename": target_pdf_name, "output": "full"},
                        timeout=3600)
     rr.raise_for_status()
     print("[ocr][full] saved:", rr.json().get("file_path"))
 
     # b) per-page TXT files
-    rr = requests.post(f"{BASE}/session/{session_id}/ocr",
+    rr = HTTP.post(f"{BASE}/session/{session_id}/ocr",
                        params={"filename": target_pdf_name, "output": "pages"},
                        timeout=3600)
     rr.raise_for_status()
@@ -114,13 +127,13 @@ if __name__ == "__main__":
     # =========================
     # Markdown (no OCR)
     # =========================
-    rr = requests.post(f"{BASE}/session/{session_id}/to-markdown",
+    rr = HTTP.post(f"{BASE}/session/{session_id}/to-markdown",
                        params={"filename": target_pdf_name, "output": "full"},
                        timeout=3600)
     rr.raise_for_status()
     print("[md][full] saved:", rr.json().get("file_path"))
 
-    rr = requests.post(f"{BASE}/session/{session_id}/to-markdown",
+    rr = HTTP.post(f"{BASE}/session/{session_id}/to-markdown",
                        params={"filename": target_pdf_name, "output": "pages"},
                        timeout=3600)
     rr.raise_for_status()
@@ -129,7 +142,7 @@ if __name__ == "__main__":
     # =========================
     # Markdown (force OCR inside Docling)
     # =========================
-    rr = requests.post(f"{BASE}/session/{session_id}/to-markdown",
+    rr = HTTP.post(f"{BASE}/session/{session_id}/to-markdown",
                        params={"filename": target_pdf_name, "force_ocr": "true", "output": "pages"},
                        timeout=7200)
     rr.raise_for_status()
@@ -139,28 +152,28 @@ if __name__ == "__main__":
     # Split pages
     # =========================
     # a) ALL pages -> separate PDFs
-    rr = requests.post(f"{BASE}/session/{session_id}/split-pages",
+    rr = HTTP.post(f"{BASE}/session/{session_id}/split-pages",
                        params={"filename": target_pdf_name},   # no pages/range -> all separate
                        timeout=1200)
     rr.raise_for_status()
     print("[split][all->separate] files:", len(rr.json().get("output_files", [])))
 
     # b) RANGE (1–5) -> ONE combined PDF
-    rr = requests.post(f"{BASE}/session/{session_id}/split-pages",
+    rr = HTTP.post(f"{BASE}/session/{session_id}/split-pages",
                        params={"filename": target_pdf_name, "page_range": "1-5", "combined": "true"},
                        timeout=600)
     rr.raise_for_status()
     print("[split][range->combined] out:", rr.json().get("output_files"))
 
     # c) specific pages (2, 7, 11, 15) -> separate PDFs
-    rr = requests.post(f"{BASE}/session/{session_id}/split-pages",
+    rr = HTTP.post(f"{BASE}/session/{session_id}/split-pages",
                        params=[("filename", target_pdf_name)] + [("pages", p) for p in [2,7,11,15]],
                        timeout=600)
     rr.raise_for_status()
     print("[split][specific->separate] files:", len(rr.json().get("output_files", [])))
 
     # d) specific pages (2, 7, 11, 15) -> ONE combined PDF
-    rr = requests.post(f"{BASE}/session/{session_id}/split-pages",
+    rr = HTTP.post(f"{BASE}/session/{session_id}/split-pages",
                        params=[("filename", target_pdf_name)] + [("pages", p) for p in [2,7,11,15]] + [("combined", "true")],
                        timeout=600)
     rr.raise_for_status()
@@ -171,7 +184,7 @@ if __name__ == "__main__":
     # =========================
     if len(pdfs) >= 2:
         names = [pdfs[0].name, pdfs[1].name]
-        rr = requests.post(f"{BASE}/session/{session_id}/merge",
+        rr = HTTP.post(f"{BASE}/session/{session_id}/merge",
                            json={"filenames": names, "out_name": "merged.pdf"},
                            timeout=600)
         rr.raise_for_status()
@@ -181,11 +194,13 @@ if __name__ == "__main__":
     # Download ALL outputs as ZIP
     # =========================
     out_zip = pathlib.Path("outputs.zip")
-    with requests.get(f"{BASE}/session/{session_id}/download",
+    with HTTP.get(f"{BASE}/session/{session_id}/download",
                       stream=True,
                       timeout=3600) as resp:
         resp.raise_for_status()
         with open(out_zip, "wb") as f:
-            for chunk in resp.iter_content(chunk_size=8192):
+            # 1 MiB chunks: 8 KiB reads make the Python/SSL layer the
+            # bottleneck for large ZIPs
+            for chunk in resp.iter_content(chunk_size=1024 * 1024):
                 if chunk: f.write(chunk)
     print("[download] saved ->", out_zip.resolve())